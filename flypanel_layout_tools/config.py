@@ -1,4 +1,11 @@
+try:
+    import tomllib
+except ImportError:
+    import tomli as tomllib
+import os
+import copy
 import toml
+import functools
 
 class Config(dict):
 
@@ -8,9 +15,13 @@ class Config(dict):
             self.load(filename)
 
     def load(self, filename):
-        with open(filename, 'r') as f:
-             data = toml.load(f)
-        self.update(data)
+        mtime_ns = os.stat(filename).st_mtime_ns
+        data = _load_toml_cached(str(filename), mtime_ns)
+        self.update(copy.deepcopy(data))
+
+    @staticmethod
+    def clear_cache():
+        _load_toml_cached.cache_clear()
 
     def print(self):
         print(toml.dumps(self))
@@ -22,6 +33,12 @@ class Config(dict):
         return dict(self)
 
 
+@functools.lru_cache(maxsize=32)
+def _load_toml_cached(filename, mtime_ns):
+    with open(filename, 'rb') as f:
+        return tomllib.load(f)
+
+
 
 
 
@@ -1,13 +1,18 @@
 import scipy.constants as constants
-import pcbnew
+
+_INCH_TO_MM = 1e3*constants.inch
+_MM_TO_INCH = 1.0/_INCH_TO_MM
 
 def inch_to_mm(val):
-    return 1e3*constants.inch*val
+    return _INCH_TO_MM*val
 
 def mm_to_inch(val):
-    return 1e-3*val/constants.inch
+    return _MM_TO_INCH*val
 
 def pos_to_pcbnew_vec(p):
+    # pcbnew is only available inside kicad - import lazily so the pure
+    # conversion helpers work without it
+    import pcbnew
     x, y = p
     xi = pcbnew.FromMM(x)
     yi = pcbnew.FromMM(y)
@@ -1,10 +1,11 @@
-import pcbnew
+import io
+import sys
+import math
 import collections
 import numpy as np
-import matplotlib.pyplot as plt
-from .config import Config 
+from .config import Config
 from .convert import inch_to_mm
-from .convert import pos_to_pcbnew_vec 
+from .convert import pos_to_pcbnew_vec
 
 class LedArray:
 
@@ -13,6 +14,7 @@ class LedArray:
         self.config = self.load_config(config)
 
     def place_components(self, filename):
+        import pcbnew
 
         w_pcb = self.to_mm(self.config['pcb']['size_x'])
         h_pcb = self.to_mm(self.config['pcb']['size_y'])
@@ -33,19 +35,30 @@ class LedArray:
 
         pcb = pcbnew.LoadBoard(filename)
 
-        led_num = ref_start 
-        for i in range(ncols):
-            for j in range(nrows):
-                ref = f'{ref_prefix}{led_num}'
-                x_led = cx_pcb + i*dx_led - 0.5*w_led  
-                y_led = cy_pcb + j*dy_led - 0.5*h_led
-                pos = (x_led, y_led)
-
-                footprint = pcb.FindFootprintByReference(ref)
-                vec = pos_to_pcbnew_vec(pos)
-                footprint.SetPosition(vec)
-                footprint.SetOrientationDegrees(np.rad2deg(angle_led))
-                led_num += 1
+        # Generate the full (i,j) grid of led positions with broadcasting.
+        # Raveling in C order matches the original led numbering (column
+        # major, j fastest).
+        ivals = np.arange(ncols)
+        jvals = np.arange(nrows)
+        x_led = cx_pcb + ivals[:,None]*dx_led - 0.5*w_led
+        y_led = cy_pcb + jvals[None,:]*dy_led - 0.5*h_led
+        x_led, y_led = np.broadcast_arrays(x_led, y_led)
+
+        refs = [f'{ref_prefix}{n}' for n in range(ref_start, ref_start + nleds)]
+        angle_deg = math.degrees(angle_led)
+
+        # Index footprints by reference once rather than having pcbnew scan
+        # the board for every lookup
+        fp_map = {fp.GetReference(): fp for fp in pcb.GetFootprints()}
+
+        for ref, x, y in zip(refs, x_led.ravel(), y_led.ravel()):
+            try:
+                footprint = fp_map[ref]
+            except KeyError:
+                raise ValueError(f'footprint {ref} not found in {filename}')
+            vec = pos_to_pcbnew_vec((x, y))
+            footprint.SetPosition(vec)
+            footprint.SetOrientationDegrees(angle_deg)
 
         pcb.Save('test.kicad_pcb')
 
@@ -66,15 +79,21 @@ class LedArray:
 # ----------------------------------------------------------------------------------
 
 def print_nested(d, indent_num=0, indent_step=2):
+    buf = io.StringIO()
+    _format_nested(d, indent_num, indent_step, buf)
+    sys.stdout.write(buf.getvalue())
+
+
+def _format_nested(d, indent_num, indent_step, out):
     indent_str = ' '*indent_step*indent_num
     if not isinstance(d,dict):
-        print(f'{indent_str}d')
+        out.write(f'{indent_str}{d}\n')
     else:
         for k, v in d.items():
             if isinstance(v,dict):
-                print(f'{indent_str}{k}:')
-                print_nested(v,indent_num+1, indent_step)
+                out.write(f'{indent_str}{k}:\n')
+                _format_nested(v, indent_num+1, indent_step, out)
             else:
-                print(f'{indent_str}{k}: {v}')
+                out.write(f'{indent_str}{k}: {v}\n')
             
 
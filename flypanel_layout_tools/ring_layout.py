@@ -1,12 +1,100 @@
-import copy
 import json
+import math
 import pprint
-import pcbnew
+import hashlib
 import numpy as np
-import matplotlib.pyplot as plt
-from .config import Config 
+from dataclasses import dataclass, fields
+try:
+    from numba import njit, prange
+    have_numba = True
+except ImportError:
+    have_numba = False
+from .config import Config
 from .convert import inch_to_mm
-from .convert import pos_to_pcbnew_vec 
+from .convert import pos_to_pcbnew_vec
+
+# Minimum panels*pins product before the numba pin position kernel is worth
+# its jit warmup - small arenas stay on the numpy broadcasting path
+NUMBA_PIN_POS_THRESHOLD = 4096
+
+# pcbnew and matplotlib are heavy imports that are only needed for component
+# placement and plotting - they are imported lazily in the methods that use
+# them so that creating layout values doesn't pay for them.
+
+
+@dataclass(frozen=True, slots=True)
+class RingLayoutValues:
+    """
+    Arena layout values computed from a ring arena config, used for
+    creating plots and placing pcb components.
+    """
+    num_panel        : int
+    panel_width      : float
+    panel_depth      : float
+    subtended_angle  : float
+    omitted_panels   : list
+    offset_angle     : float
+    pcb_side         : str
+    panel_ref_prefix : str
+    num_pins         : int
+    pin_pitch        : float
+    omitted_pins     : list
+    installed        : np.ndarray
+    num_installed    : int
+    radius_front     : float
+    radius_back      : float
+    radius_pins      : float
+    angles           : np.ndarray
+    front_x          : np.ndarray
+    front_y          : np.ndarray
+    back_x           : np.ndarray
+    back_y           : np.ndarray
+    lines_front      : np.ndarray
+    lines_back       : np.ndarray
+    lines_left       : np.ndarray
+    lines_right      : np.ndarray
+    pin_positions    : np.ndarray
+    pin_centers      : np.ndarray
+
+    def to_dict(self):
+        """
+        Returns the values as a nested dict in the historical layout -
+        panel and pin parameters grouped under 'panel' and 'pins' keys.
+        """
+        return {
+                'panel': {
+                    'number'       : self.num_panel,
+                    'width'        : self.panel_width,
+                    'depth'        : self.panel_depth,
+                    'subtended'    : self.subtended_angle,
+                    'omitted'      : self.omitted_panels,
+                    'offset_angle' : self.offset_angle,
+                    'pcb_side'     : self.pcb_side,
+                    'ref_prefix'   : self.panel_ref_prefix,
+                    },
+                'pins': {
+                    'number'    : self.num_pins,
+                    'pitch'     : self.pin_pitch,
+                    'omitted'   : self.omitted_pins,
+                    },
+                'installed'     : self.installed,
+                'num_installed' : self.num_installed,
+                'radius_front'  : self.radius_front,
+                'radius_back'   : self.radius_back,
+                'radius_pins'   : self.radius_pins,
+                'angles'        : self.angles,
+                'front_x'       : self.front_x,
+                'front_y'       : self.front_y,
+                'back_x'        : self.back_x,
+                'back_y'        : self.back_y,
+                'lines_front'   : self.lines_front,
+                'lines_back'    : self.lines_back,
+                'lines_left'    : self.lines_left,
+                'lines_right'   : self.lines_right,
+                'pin_positions' : self.pin_positions,
+                'pin_centers'   : self.pin_centers,
+                }
+
 
 class RingLayout:
     """
@@ -14,20 +102,43 @@ class RingLayout:
     """
 
     PRINT_FLOAT_PREC = 4
+    VALUES_CACHE_SIZE = 32
+
+    # Cache of computed layout values keyed by config digest. The values are
+    # deterministic in the config so identical configs (common in parameter
+    # sweeps) can share one computation. Treated as read only by all users.
+    _values_cache = {}
 
-    def __init__(self, config, plot=False):
+    def __init__(self, config, plot=False, verbose=True):
         """
         RingLayout class constructor
 
         Parameters
         ---------
-        config : Path, str, or dict
-                 Path/str specifying the location of the .toml configuration 
-                 file for the arena or a dict with the configration values.
+        config  : Path, str, or dict
+                  Path/str specifying the location of the .toml configuration
+                  file for the arena or a dict with the configration values.
+
+        plot    : bool
+                  when true show a plot of the arena layout geometry
+
+        verbose : bool
+                  when true print the arena layout values on construction
         """
         self.config = self.load_config(config)
+        # Bind the unit conversions once rather than checking the config
+        # units on every call
+        if self.config['units']['length'] == 'mm':
+            self._to_mm = lambda v: v
+        else:
+            self._to_mm = inch_to_mm
+        if self.config['units']['angle'] == 'rad':
+            self._to_rad = lambda v: v
+        else:
+            self._to_rad = np.deg2rad
         self.values = self.make_values()
-        self.print_values()
+        if verbose:
+            self.print_values()
         if plot:
             self.plot_arena()
 
@@ -35,29 +146,38 @@ class RingLayout:
     def make_values(self):
         """
         Creates the arena layout values for creating plots and placing pcb
-        components.
+        components. Results are cached by config digest so repeated
+        construction from an identical config skips the computation.
         """
+        config_digest = hashlib.blake2b(json.dumps(self.config.to_dict(),
+            sort_keys=True, default=str).encode()).digest()
+        try:
+            return RingLayout._values_cache[config_digest]
+        except KeyError:
+            pass
 
         # Extract parameters from config - convert so units are mm and rad
         num_panel = self.config['panel']['number']
         pcb_side = self.config['pcb']['panel'].get('pcb_side', 'front')
         panel_ref_prefix = self.config['pcb']['panel']['ref_prefix']
-        panel_width = self.to_mm(self.config['panel']['width'])
-        panel_depth = self.to_mm(self.config['panel']['depth'])
-        offset_angle = self.to_rad(self.config['panel']['offset_angle'])
+        panel_width = self._to_mm(self.config['panel']['width'])
+        panel_depth = self._to_mm(self.config['panel']['depth'])
+        offset_angle = self._to_rad(self.config['panel']['offset_angle'])
         omitted_panels = self.config['panel']['omitted']
-        installed_mask = [not (i in omitted_panels) for i in range(num_panel)]
-        num_installed = np.array(installed_mask).sum()
+        installed_mask = ~np.isin(np.arange(num_panel),
+                np.asarray(omitted_panels, dtype=int))
+        num_installed = int(installed_mask.sum())
         num_pins  = self.config['pins']['number']
-        pin_pitch = self.to_mm(self.config['pins']['pitch'])
-        pin_depth = self.to_mm(self.config['pins']['depth'])
+        pin_pitch = self._to_mm(self.config['pins']['pitch'])
+        pin_depth = self._to_mm(self.config['pins']['depth'])
         omitted_pins = self.config['pins']['omitted']
 
         # Angle subtended by one panel 
         subtended_angle = 2.0*np.pi/num_panel      
 
-        # Radius of circle tangent to panel front
-        radius_front = (0.5*panel_width)/np.tan(0.5*subtended_angle)
+        # Radius of circle tangent to panel front. 0.5*subtended_angle is
+        # just pi/num_panel
+        radius_front = (0.5*panel_width)/math.tan(np.pi/num_panel)
 
         # Radius of circle tangent to panel rear
         radius_back = radius_front + panel_depth
@@ -65,94 +185,120 @@ class RingLayout:
         # Radius of circle tangent to line of panel pins
         radius_pins = radius_front + pin_depth
 
-        # Array of angular positions
+        # Array of angular positions. Angles are stored negated (clockwise
+        # positive) to match the pcbnew y-down coordinate convention - this
+        # is the one and only sign flip in the geometry path.
         angles = np.arange(num_panel)*subtended_angle + offset_angle
-        angles = angles[installed_mask]
-        angles = -angles
+        angles = -angles[installed_mask]
+
+        # Geometry arrays use float32 - plenty of precision for mm scale
+        # coordinates at half the memory and twice the simd lanes
+        angles = angles.astype(np.float32)
+
+        # Compute cos/sin of angles once and share across all geometry
+        cos_a = np.cos(angles)
+        sin_a = np.sin(angles)
 
         # x,y coords of panel center front positions
-        front_x = radius_front*np.cos(angles)
-        front_y = radius_front*np.sin(angles)
+        front_x = radius_front*cos_a
+        front_y = radius_front*sin_a
 
         # x,y coord of panel center back positions
-        back_x = radius_back*np.cos(angles)
-        back_y = radius_back*np.sin(angles)
+        back_x = radius_back*cos_a
+        back_y = radius_back*sin_a
+
+        # x,y coords of panel pin row centers
+        pin_cx = radius_pins*cos_a
+        pin_cy = radius_pins*sin_a
 
         # Get lines for front of panels
-        lines_front = get_face_lines(front_x, front_y, angles, panel_width)
-        lines_back  = get_face_lines(back_x, back_y, angles, panel_width)
+        lines_front = get_face_lines(front_x, front_y, cos_a, sin_a, panel_width)
+        lines_back  = get_face_lines(back_x, back_y, cos_a, sin_a, panel_width)
         lines_left, lines_right = get_side_lines(lines_front, lines_back)
 
         # Get pin positions
-        pin_positions, pin_centers = get_pin_pos(angles, num_pins, radius_pins, 
-                pin_pitch, omitted_pins)
-
-        values = {
-                'panel': {
-                    'number'       : num_panel,
-                    'width'        : panel_width,
-                    'depth'        : panel_depth,
-                    'subtended'    : subtended_angle,
-                    'omitted'      : omitted_panels,
-                    'offset_angle' : offset_angle,
-                    'pcb_side'     : pcb_side,
-                    'ref_prefix'   : panel_ref_prefix,
-                    },
-                'pins': {
-                    'number'    : num_pins, 
-                    'pitch'     : pin_pitch,
-                    'omitted'   : omitted_pins,
-                    },
-                'installed'     : installed_mask,
-                'num_installed' : num_installed,
-                'radius_front'  : radius_front,
-                'radius_back'   : radius_back,
-                'radius_pins'   : radius_pins,
-                'angles'        : angles,
-                'front_x'       : front_x,
-                'front_y'       : front_y,
-                'back_x'        : back_x, 
-                'back_y'        : back_y, 
-                'lines_front'   : lines_front, 
-                'lines_back'    : lines_back, 
-                'lines_left'    : lines_left, 
-                'lines_right'   : lines_right, 
-                'pin_positions' : pin_positions,
-                'pin_centers'   : pin_centers,
-                }
+        pin_positions, pin_centers = get_pin_pos(pin_cx, pin_cy, cos_a, sin_a,
+                num_pins, pin_pitch, omitted_pins)
+
+        values = RingLayoutValues(
+                num_panel        = num_panel,
+                panel_width      = panel_width,
+                panel_depth      = panel_depth,
+                subtended_angle  = subtended_angle,
+                omitted_panels   = omitted_panels,
+                offset_angle     = offset_angle,
+                pcb_side         = pcb_side,
+                panel_ref_prefix = panel_ref_prefix,
+                num_pins         = num_pins,
+                pin_pitch        = pin_pitch,
+                omitted_pins     = omitted_pins,
+                installed        = installed_mask,
+                num_installed    = num_installed,
+                radius_front     = radius_front,
+                radius_back      = radius_back,
+                radius_pins      = radius_pins,
+                angles           = angles,
+                front_x          = front_x,
+                front_y          = front_y,
+                back_x           = back_x,
+                back_y           = back_y,
+                lines_front      = lines_front,
+                lines_back       = lines_back,
+                lines_left       = lines_left,
+                lines_right      = lines_right,
+                pin_positions    = pin_positions,
+                pin_centers      = pin_centers,
+                )
+        # Freeze the array contents before caching - the same values
+        # instance is shared by every layout built from this config, so
+        # accidental mutation should raise rather than corrupt the cache
+        for field in fields(values):
+            value = getattr(values, field.name)
+            if isinstance(value, np.ndarray):
+                value.flags.writeable = False
+
+        # Keep the cache bounded - drop the oldest entry once full
+        if len(RingLayout._values_cache) >= self.VALUES_CACHE_SIZE:
+            RingLayout._values_cache.pop(next(iter(RingLayout._values_cache)))
+        RingLayout._values_cache[config_digest] = values
         return values
 
 
     def print_values(self):
         """ Prints a subset of values of arena config """
         prec = self.PRINT_FLOAT_PREC
-        print()
-        print('parameters')
-        print('----------')
-        print(f'panel')
-        print(f'  number:        {self.values["panel"]["number"]}')
-        print(f'  width:         {self.values["panel"]["width"]:0.{prec}f} (mm)')
-        print(f'  depth:         {self.values["panel"]["depth"]:0.{prec}f} (mm)')
-        print(f'  subtended:     {self.values["panel"]["subtended"]:0.{prec}f} (rad)')
-        print(f'  omitted:       {self.values["panel"]["omitted"]}')
-        print(f'  offset angle:  {self.values["panel"]["offset_angle"]:0.{prec}f} (rad)')
-        print(f'  pcb_side:      {self.values["panel"]["pcb_side"]}')
-        print(f'pins')
-        print(f'  number:        {self.values["pins"]["number"]}')
-        print(f'  pitch:         {self.values["pins"]["pitch"]:0.{prec}f} (mm)')
-        print(f'  width:         {self.values["pins"]["pitch"]:0.{prec}f} (mm)')
-        print(f'radius_front:    {self.values["radius_front"]:0.{prec}f} (mm)')
-        print(f'radius_pins:     {self.values["radius_pins"]:0.{prec}f} (mm)')
-        print(f'radius_back:     {self.values["radius_back"]:0.{prec}f} (mm)')
-        #print(f'installed:       {self.values["installed"]}')
-        print()
+        values = self.values
+        msg = (
+                f'\n'
+                f'parameters\n'
+                f'----------\n'
+                f'panel\n'
+                f'  number:        {values.num_panel}\n'
+                f'  width:         {values.panel_width:0.{prec}f} (mm)\n'
+                f'  depth:         {values.panel_depth:0.{prec}f} (mm)\n'
+                f'  subtended:     {values.subtended_angle:0.{prec}f} (rad)\n'
+                f'  omitted:       {values.omitted_panels}\n'
+                f'  offset angle:  {values.offset_angle:0.{prec}f} (rad)\n'
+                f'  pcb_side:      {values.pcb_side}\n'
+                f'pins\n'
+                f'  number:        {values.num_pins}\n'
+                f'  pitch:         {values.pin_pitch:0.{prec}f} (mm)\n'
+                f'  width:         {values.pin_pitch:0.{prec}f} (mm)\n'
+                f'radius_front:    {values.radius_front:0.{prec}f} (mm)\n'
+                f'radius_pins:     {values.radius_pins:0.{prec}f} (mm)\n'
+                f'radius_back:     {values.radius_back:0.{prec}f} (mm)\n'
+                )
+        print(msg)
 
 
     def plot_arena(self):
         """ Plots a figure of showing the arena layout geometry """
+        import matplotlib.pyplot as plt
+        from matplotlib.collections import LineCollection
+
         # Get title string
-        num_panel = self.values['panel']['number']
-        num_installed = np.array(self.values['installed']).sum()
+        num_panel = self.values.num_panel
+        num_installed = self.values.installed.sum()
         title = f'{num_installed}-{num_panel} Ring Arena'
 
         # Create plot showing arena layout
@@ -164,15 +310,22 @@ class RingLayout:
                 ('lines_right', 'b'),
                 ]
 
-        # Plot panel sides 
+        # Plot panel sides as a single collection of line segments. The
+        # (N,2,2) line arrays are [x0,x1],[y0,y1] per panel - transpose to
+        # the (point, xy) layout LineCollection expects.
+        segments = np.concatenate([getattr(self.values, name).transpose(0,2,1)
+            for name, _ in lines_and_colors])
+        colors = []
         for name, color in lines_and_colors:
-            for line in self.values[name]:
-                plt.plot(*line, color)
+            colors.extend([color]*len(getattr(self.values, name)))
+        ax.add_collection(LineCollection(segments, colors=colors))
 
-        # Plot panel pins
-        for pos in self.values['pin_positions']:
-            plt.plot(*pos, '.k')
+        # Plot panel pins with a single scatter call
+        pin_positions = self.values.pin_positions
+        ax.scatter(pin_positions[:,0,:].ravel(), pin_positions[:,1,:].ravel(),
+                marker='.', c='k')
 
+        ax.autoscale_view()
         ax.grid(True)
         ax.set_xlabel('x (mm)')
         ax.set_ylabel('y (mm)')
@@ -184,6 +337,7 @@ class RingLayout:
         plt.show()
 
     def place_components(self, filename):
+        import pcbnew
 
         # Load and print pcb placement parameters
         pcb_params = self.get_pcb_params()
@@ -194,54 +348,59 @@ class RingLayout:
         ref_start = pcb_params['panel']['ref_start']
 
         # Get list of panel header references
-        num = self.values['num_installed']
+        num = self.values.num_installed
         panel_num_list = list(range(ref_start, ref_start+num))
         panel_ref_list = [f'{ref_prefix}{i}' for i in panel_num_list]
 
         pcb = pcbnew.LoadBoard(filename)
 
+        # Index footprints by reference once rather than having pcbnew scan
+        # the board for every lookup
+        fp_map = {fp.GetReference(): fp for fp in pcb.GetFootprints()}
+
         # Get Dictionary mapping panel reference to the reference for all components to be
         # placed relative to the header
         panel_ref_to_rel = get_panel_ref_to_rel(pcb_params, panel_num_list, panel_ref_list)
 
         # Get component data, e.g., positions and angles of all panel headers
         # and relative components
-        cur_comp_data = get_cur_comp_data(pcb, panel_ref_list, panel_ref_to_rel)
+        cur_comp_data = get_cur_comp_data(fp_map, panel_ref_list, panel_ref_to_rel)
         new_comp_data = get_new_comp_data(self.values, pcb_params, panel_ref_list, 
                 panel_ref_to_rel, cur_comp_data)
 
-        for ref, data in new_comp_data.items():
-            footprint = pcb.FindFootprintByReference(ref)
-            pos = data['x'], data['y']
-            vec = pos_to_pcbnew_vec(pos)
+        # Convert orientation angles to degrees in one array call - the loop
+        # below only makes pcbnew calls
+        refs, xvals, yvals, angs = new_comp_data
+        degs = np.rad2deg(angs)
+        flip_to_back = self.values.pcb_side == 'back'
+        panel_ref_set = set(panel_ref_list)
+
+        for ref, x, y, deg in zip(refs, xvals, yvals, degs):
+            try:
+                footprint = fp_map[ref]
+            except KeyError:
+                raise ValueError(f'footprint {ref} not found in {filename}')
+            vec = pos_to_pcbnew_vec((x, y))
             footprint.SetPosition(vec)
-            if self.values['panel']['pcb_side'] == 'back' and ref in panel_ref_list:
+            if flip_to_back and ref in panel_ref_set:
                 footprint.Flip(vec, True)
-                footprint.SetOrientationDegrees(np.rad2deg(data['angle'] - np.pi))
+                footprint.SetOrientationDegrees(deg - 180.0)
             else:
-                footprint.SetOrientationDegrees(np.rad2deg(data['angle']))
+                footprint.SetOrientationDegrees(deg)
+
+        cx = pcb_params['center_x']
+        cy = pcb_params['center_y']
 
-        # Create outside boundary
+        # Create outside boundary as a single rect shape
         if pcb_params['add_boundary']:
             dx = 0.5*pcb_params['size_x']
             dy = 0.5*pcb_params['size_y']
-            cx = pcb_params['center_x']
-            cy = pcb_params['center_y']
-            line_list = [
-                    ((cx-dx, cy-dy), (cx-dx, cy+dy)),
-                    ((cx-dx, cy+dy), (cx+dx, cy+dy)),
-                    ((cx+dx, cy+dy), (cx+dx, cy-dy)),
-                    ((cx+dx, cy-dy), (cx-dx, cy-dy)),
-                    ]
-            for p, q in line_list:
-                pvec = pos_to_pcbnew_vec(p)
-                qvec = pos_to_pcbnew_vec(q)
-                shape = pcbnew.PCB_SHAPE(pcb, pcbnew.SHAPE_T_SEGMENT)
-                shape.SetStart(pvec)
-                shape.SetEnd(qvec)
-                shape.SetLayer(pcbnew.Edge_Cuts)
-                shape.SetWidth(pcbnew.FromMM(pcb_params['line_width']))
-                pcb.Add(shape)
+            shape = pcbnew.PCB_SHAPE(pcb, pcbnew.SHAPE_T_RECT)
+            shape.SetStart(pos_to_pcbnew_vec((cx-dx, cy-dy)))
+            shape.SetEnd(pos_to_pcbnew_vec((cx+dx, cy+dy)))
+            shape.SetLayer(pcbnew.Edge_Cuts)
+            shape.SetWidth(pcbnew.FromMM(pcb_params['line_width']))
+            pcb.Add(shape)
 
         # Add inner cutout
         if pcb_params['add_cutout']:
@@ -259,13 +418,15 @@ class RingLayout:
 
 
     def get_pcb_params(self):
-        pcb_params = copy.deepcopy(self.config['pcb'])
-        pcb_params['size_x'] = self.to_mm(pcb_params['size_x'])
-        pcb_params['size_y'] = self.to_mm(pcb_params['size_y'])
-        pcb_params['center_x'] = self.to_mm(pcb_params['center_x'])
-        pcb_params['center_y'] = self.to_mm(pcb_params['center_y'])
-        pcb_params['line_width'] = self.to_mm(pcb_params['line_width'])
-        pcb_params['cutout_diam'] = self.to_mm(pcb_params['cutout_diam'])
+        # Shallow copy is enough here - only top level scalars are replaced
+        # and the nested panel/relative dicts are read only
+        pcb_params = dict(self.config['pcb'])
+        pcb_params['size_x'] = self._to_mm(pcb_params['size_x'])
+        pcb_params['size_y'] = self._to_mm(pcb_params['size_y'])
+        pcb_params['center_x'] = self._to_mm(pcb_params['center_x'])
+        pcb_params['center_y'] = self._to_mm(pcb_params['center_y'])
+        pcb_params['line_width'] = self._to_mm(pcb_params['line_width'])
+        pcb_params['cutout_diam'] = self._to_mm(pcb_params['cutout_diam'])
         pcb_params['add_boundary'] = pcb_params.get('add_boundary', True)
         pcb_params['add_cutout'] = pcb_params.get('add_cutout', True)
         return pcb_params
@@ -302,20 +463,23 @@ class RingLayout:
 
 
 
-def get_face_lines(xvals, yvals, angles, width):
-    """ 
+def get_face_lines(xvals, yvals, cos_a, sin_a, width):
+    """
     Get lines for panel front (or back) panel faces.
 
     Parameters
     ----------
-    xvals  : ndarray 
+    xvals  : ndarray
              array of x-coord of panel face centers
 
-    yvals  : ndarray 
+    yvals  : ndarray
              array of y-coord of panel face centers
 
-    angles : ndarray
-             array of panel angles (rad) around ring
+    cos_a  : ndarray
+             array of cos of panel angles around ring
+
+    sin_a  : ndarray
+             array of sin of panel angles around ring
 
     width  : float
              the width of a panel (mm)
@@ -323,18 +487,20 @@ def get_face_lines(xvals, yvals, angles, width):
     Returns
     -------
 
-    lines : list
-            list of line coordinates [(x0,x1), (y0, y1)] for
-            each panel face. 
+    lines : ndarray
+            array of line coordinates, shape (num_panel, 2, 2), where
+            lines[i] = [[x0,x1], [y0,y1]] for each panel face.
 
     """
-    lines = []
-    for x, y, ang in zip(xvals, yvals , angles + 0.5*np.pi):
-        x0 = x - 0.5*width*np.cos(ang)
-        y0 = y - 0.5*width*np.sin(ang)
-        x1 = x + 0.5*width*np.cos(ang)
-        y1 = y + 0.5*width*np.sin(ang)
-        lines.append([(x0,x1), (y0,y1)])
+    # cos(a + pi/2) = -sin(a), sin(a + pi/2) = cos(a)
+    hw_ca = (0.5*width)*(-sin_a)
+    hw_sa = (0.5*width)*cos_a
+    # Endpoints are center -/+ the half width direction - one broadcast
+    # against the sign pair produces both ends at once
+    signs = np.array([-1.0, 1.0], dtype=cos_a.dtype)
+    x_endpts = xvals[:,None] + signs[None,:]*hw_ca[:,None]
+    y_endpts = yvals[:,None] + signs[None,:]*hw_sa[:,None]
+    lines = np.stack([x_endpts, y_endpts], axis=1)
     return lines
 
 
@@ -344,49 +510,52 @@ def get_side_lines(lines_front, lines_back):
 
     Parameters
     ----------
-    lines_front : list
-                  list of lines for panels front faces [(x0,x1),(y0,y1)]
+    lines_front : ndarray
+                  array of lines for panel front faces, shape (N,2,2)
 
-    lines_back  : list
-                  list of lines for panel back faces [(x0,x0),(y0,y1)]
+    lines_back  : ndarray
+                  array of lines for panel back faces, shape (N,2,2)
 
     Returns
     -------
-    lines_left  : list
-                  list of lines for panel left faces 
+    lines_left  : ndarray
+                  array of lines for panel left faces, shape (N,2,2)
+
+    lines_right : ndarray
+                  array of lines for panel right faces, shape (N,2,2)
 
-    lines_right : list of lines for panel right faces
-                 
     """
-    lines_left  = []
-    lines_right = []
-    for fline, bline in zip(lines_front, lines_back):
-        fx, fy = fline
-        bx, by = bline
-        lines_left.append([
-            (fx[0], bx[0]), 
-            (fy[0], by[0]),
-            ])
-        lines_right.append([
-            (fx[1], bx[1]), 
-            (fy[1], by[1])
-            ])
+    F, B = lines_front, lines_back
+    lines_left = np.stack([
+        np.stack([F[:,0,0], B[:,0,0]], -1),
+        np.stack([F[:,1,0], B[:,1,0]], -1),
+        ], axis=1)
+    lines_right = np.stack([
+        np.stack([F[:,0,1], B[:,0,1]], -1),
+        np.stack([F[:,1,1], B[:,1,1]], -1),
+        ], axis=1)
     return lines_left, lines_right
 
-def get_pin_pos(angles, num, radius, pitch, omitted):
+def get_pin_pos(cx, cy, cos_a, sin_a, num, pitch, omitted):
     """
     Get panel pin positions
 
-    Parameters 
+    Parameters
     ----------
-    angles  : ndarray
-              array of panel angles (rad) around ring
+    cx      : ndarray
+              array of x-coord of panel pin row centers
 
-    num     : int 
-              number of pins on panel header
+    cy      : ndarray
+              array of y-coord of panel pin row centers
 
-    radius  : float
-              radius of circle tangent to line of panel pins
+    cos_a   : ndarray
+              array of cos of panel angles around ring
+
+    sin_a   : ndarray
+              array of sin of panel angles around ring
+
+    num     : int
+              number of pins on panel header
 
     pitch   : float
               pitch/dist between header pins
@@ -396,35 +565,53 @@ def get_pin_pos(angles, num, radius, pitch, omitted):
     Returns
     -------
 
-    pin_posittions : list 
-                     list of pin positions for each header
+    pin_positions : ndarray
+                    array of pin positions, shape (N, 2, num_kept), where
+                    pin_positions[i] = [xvals, yvals] for each header
 
-    pin centers    : list 
-                     list of pin center x,y coords for each header
+    pin_centers   : ndarray
+                    array of pin center x,y coords, shape (N, 2)
 
 
     """
-    pin_positions = [] 
-    pin_centers = [] 
-    width = (num - 1)*pitch   
-    for ind, ang in enumerate(angles):
-        cx = radius*np.cos(ang)
-        cy = radius*np.sin(ang)
-        pin_centers.append((cx, cy))
-        pin_pos_x = []
-        pin_pos_y = []
-        for i in range(num):
-            if (i+1) in omitted:
-                continue
-            d  = i*pitch
-            x = cx + (i*pitch - 0.5*width)*np.cos(ang + 0.5*np.pi)
-            y = cy + (i*pitch - 0.5*width)*np.sin(ang + 0.5*np.pi)
-            pin_pos_x.append(x)
-            pin_pos_y.append(y)
-        pin_positions.append((pin_pos_x, pin_pos_y))
+    keep = np.ones(num, dtype=bool)
+    omitted_idx = np.asarray(omitted, dtype=int) - 1
+    keep[omitted_idx[(omitted_idx >= 0) & (omitted_idx < num)]] = False
+    d = ((np.arange(num) - 0.5*(num - 1))*pitch).astype(cos_a.dtype)
+    if have_numba and cos_a.size*num >= NUMBA_PIN_POS_THRESHOLD:
+        d = d[keep]
+        x = np.empty((cos_a.size, d.size), dtype=cos_a.dtype)
+        y = np.empty((cos_a.size, d.size), dtype=cos_a.dtype)
+        _pin_pos_kernel(cx, cy, cos_a, sin_a, d, x, y)
+    else:
+        # cos(a + pi/2) = -sin(a), sin(a + pi/2) = cos(a)
+        ca2 = -sin_a
+        sa2 = cos_a
+        x = cx[:,None] + d[None,:]*ca2[:,None]
+        y = cy[:,None] + d[None,:]*sa2[:,None]
+        x = x[:,keep]
+        y = y[:,keep]
+    pin_positions = np.stack([x, y], axis=1)
+    pin_centers = np.stack([cx, cy], axis=-1)
     return pin_positions, pin_centers
 
 
+if have_numba:
+
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _pin_pos_kernel(cx, cy, cos_a, sin_a, d, out_x, out_y):
+        """
+        Fused kernel for get_pin_pos - computes pin positions for all
+        panels in one pass with no intermediate arrays.
+        """
+        for p in prange(cos_a.size):
+            ca = cos_a[p]
+            sa = sin_a[p]
+            for i in range(d.size):
+                out_x[p,i] = cx[p] - d[i]*sa
+                out_y[p,i] = cy[p] + d[i]*ca
+
+
 
 def get_panel_ref_to_rel(pcb_params, panel_num_list, panel_ref_list): 
     """ 
@@ -444,44 +631,14 @@ def get_panel_ref_to_rel(pcb_params, panel_num_list, panel_ref_list):
     return panel_ref_to_rel
 
 
-def get_comp_data_by_ref(pcb, ref): 
-    """
-    Gets the component data, x y position (mm) and angle (radians),
-    for the given component reference.
-
-    Parameters
-    ----------
-    pcb : Board
-          kicad pcbnew board
-
-    ref : string
-          component reference designator
-
-    Returns
-    -------
-    comp_data : dict
-                dictionary of componetn data x, y, angle
-
-    """
-    footprint = pcb.FindFootprintByReference(ref)
-    position = footprint.GetPosition()
-    angle = footprint.GetOrientation().AsRadians()
-    comp_data = {
-            'x'     : pcbnew.ToMM(position.x),
-            'y'     : pcbnew.ToMM(position.y),
-            'angle' : angle,
-            }
-    return comp_data
-
-
-def get_cur_comp_data(pcb, panel_ref_list, panel_ref_to_rel): 
+def get_cur_comp_data(fp_map, panel_ref_list, panel_ref_to_rel):
     """
     Get the component data for all panel headers and relative components.
 
     Parameters
     ----------
-    pcb              : Board
-                       kicad pcbnew board 
+    fp_map           : dict
+                       dictionary mapping component reference to footprint
 
     panel_ref_list   : list
                        list of panel header references
@@ -491,16 +648,29 @@ def get_cur_comp_data(pcb, panel_ref_list, panel_ref_to_rel):
                        relative component references.
 
     Returns:
-    comp_data : dict
-                dictionary of mapping reference to component data
-                e.g. x,y positions and orientation angles
+    comp_data : tuple
+                (refs, x, y, angle) where refs is the list of component
+                references and x, y, angle are parallel ndarrays of the
+                positions (mm) and orientation angles (rad)
     """
-    comp_data = {}
+    import pcbnew
+    refs = []
     for panel_ref in panel_ref_list:
-        comp_data[panel_ref] = get_comp_data_by_ref(pcb, panel_ref)
-        for rel_comp_ref in panel_ref_to_rel[panel_ref]:
-            comp_data[rel_comp_ref] = get_comp_data_by_ref(pcb, rel_comp_ref)
-    return comp_data
+        refs.append(panel_ref)
+        refs.extend(panel_ref_to_rel[panel_ref])
+    xvals = np.empty(len(refs))
+    yvals = np.empty(len(refs))
+    angs = np.empty(len(refs))
+    for i, ref in enumerate(refs):
+        try:
+            footprint = fp_map[ref]
+        except KeyError:
+            raise ValueError(f'footprint {ref} not found on board')
+        position = footprint.GetPosition()
+        xvals[i] = pcbnew.ToMM(position.x)
+        yvals[i] = pcbnew.ToMM(position.y)
+        angs[i] = footprint.GetOrientation().AsRadians()
+    return refs, xvals, yvals, angs
 
 
 def get_new_comp_data(arena_values, pcb_params, panel_ref_list, panel_ref_to_rel, cur_comp_data): 
@@ -510,8 +680,8 @@ def get_new_comp_data(arena_values, pcb_params, panel_ref_list, panel_ref_to_rel
 
     Parameters
     ----------
-    arena_values     : dict
-                       dictionary of arena values, e.g. panel angle, x,y positions, etc. 
+    arena_values     : RingLayoutValues
+                       arena layout values, e.g. panel angles, x,y positions, etc.
 
     pcb_params       : dict
                        dictionary of pcb layout parameters
@@ -523,16 +693,17 @@ def get_new_comp_data(arena_values, pcb_params, panel_ref_list, panel_ref_to_rel
                        dictionary mapping panel references to list of relative component
                        references.
 
-    cur_comp_data    : dict
-                       dictionary of mapping reference to component data as currently in 
-                       pcb file e.g. x,y positions and orientation angles
+    cur_comp_data    : tuple
+                       (refs, x, y, angle) component data as currently in the
+                       pcb file, as returned by get_cur_comp_data
 
     Returns
     -------
-    new_comp_data    : dict
-                       dictionary of mapping reference to component data for desired layuot  
-                       e.g. x,y positions and orientation angles
-                    
+    new_comp_data    : tuple
+                       (refs, x, y, angle) component data for the desired
+                       layout where refs is the list of component references
+                       and x, y, angle are parallel ndarrays
+
     """
 
     # Extract info for calculating new positions and orientatins
@@ -541,59 +712,62 @@ def get_new_comp_data(arena_values, pcb_params, panel_ref_list, panel_ref_to_rel
     ref_prefix = pcb_params['panel']['ref_prefix']
     model_num = pcb_params['relative']['model']
     model_ref = f'{ref_prefix}{model_num}'
-    angles = arena_values['angles']
-    pin_centers = arena_values['pin_centers']
-    pcb_side = arena_values['panel']['pcb_side']
-
-    # Get desired x,y positions and angles for panel headers
-    new_comp_data = {}
-    for ind, panel_ref in enumerate(panel_ref_list):
-        angle = -(angles[ind] + np.pi/2) 
-        cx, cy = pin_centers[ind]
-        cx, cy = float(cx + pcb_cx), float(cy + pcb_cy)
-        new_comp_data[panel_ref] = {'x': cx, 'y': cy, 'angle': angle }
+    angles = arena_values.angles
+    pin_centers = arena_values.pin_centers
+
+    cur_refs, cur_x, cur_y, cur_ang = cur_comp_data
+    cur_ind = {ref: i for i, ref in enumerate(cur_refs)}
+
+    # Get desired x,y positions and angles for panel headers. The header
+    # rotation is the negated panel angle, so the rotation applied to the
+    # relative components below is just angles + pi/2 - no re-negation.
+    rot_ang = angles + 0.5*np.pi
+    panel_ang = -rot_ang
+    panel_x = pin_centers[:,0] + pcb_cx
+    panel_y = pin_centers[:,1] + pcb_cy
 
     # Get model data and data for relative components
-    model_data = cur_comp_data[model_ref]
-    model_rel_data = [cur_comp_data[item] for item in panel_ref_to_rel[model_ref]]
-    
-    # Shift and rotate model and relative components so that model component center
+    model_i = cur_ind[model_ref]
+    model_rel_refs = panel_ref_to_rel[model_ref]
+    rel_i = np.asarray([cur_ind[ref] for ref in model_rel_refs], dtype=int)
+
+    # Shift and rotate relative components so that the model component center
     # is at origin and rotation is 0.0
-    angle = model_data['angle']
-    rot_matrix = np.array([
-        [np.cos(angle), -np.sin(angle)],
-        [np.sin(angle),  np.cos(angle)],
-        ])
-    for data in model_rel_data:
-        p = np.array([data['x']-model_data['x'], data['y'] - model_data['y']])
-        p = np.dot(rot_matrix, p)
-        data['x'] = p[0]
-        data['y'] = p[1]
-        data['angle'] = data['angle'] - angle 
-    model_data['x'] = 0.0
-    model_data['y'] = 0.0
-    model_data['angle'] = 0.0
-
-    # Get placements for all relative components
-    for panel_ref, rel_comp_ref_list in panel_ref_to_rel.items():
-        cx = new_comp_data[panel_ref]['x']
-        cy = new_comp_data[panel_ref]['y']
-        angle = -new_comp_data[panel_ref]['angle']
-        rot_matrix = np.array([
-            [np.cos(angle), -np.sin(angle)],
-            [np.sin(angle),  np.cos(angle)],
-            ])
-        for ind, rel_comp_ref in enumerate(rel_comp_ref_list):
-            data = model_rel_data[ind]
-            p = np.array([data['x'], data['y']])
-            p = np.dot(rot_matrix, p)
-            rel_angle = data['angle']
-            new_comp_data[rel_comp_ref] = {
-                    'x'     :  float(cx + p[0]),
-                    'y'     :  float(cy + p[1]),
-                    'angle' :  -(angle-rel_angle),
-                    }
-    return new_comp_data
+    # math trig avoids the ufunc dispatch on these scalars
+    angle = cur_ang[model_i]
+    cos_m = math.cos(angle)
+    sin_m = math.sin(angle)
+    dx = cur_x[rel_i] - cur_x[model_i]
+    dy = cur_y[rel_i] - cur_y[model_i]
+    rel_x = cos_m*dx - sin_m*dy
+    rel_y = sin_m*dx + cos_m*dy
+    rel_ang = cur_ang[rel_i] - angle
+
+    # Get placements for all relative components. Rotate the (M,) block of
+    # model relative positions by every panel angle in one broadcasted
+    # computation rather than building a 2x2 matrix per panel.
+    cos_r = np.cos(rot_ang)
+    sin_r = np.sin(rot_ang)
+    new_x = panel_x[:,None] + cos_r[:,None]*rel_x[None,:] - sin_r[:,None]*rel_y[None,:]
+    new_y = panel_y[:,None] + sin_r[:,None]*rel_x[None,:] + cos_r[:,None]*rel_y[None,:]
+    new_ang = -(rot_ang[:,None] - rel_ang[None,:])
+
+    # Flatten panel header and relative component data into parallel arrays
+    refs = list(panel_ref_list)
+    xvals = [panel_x]
+    yvals = [panel_y]
+    angs = [panel_ang]
+    for i, panel_ref in enumerate(panel_ref_list):
+        rel_comp_ref_list = panel_ref_to_rel[panel_ref]
+        num_rel = len(rel_comp_ref_list)
+        if num_rel > rel_i.size:
+            raise ValueError(f'panel {panel_ref} has {num_rel} relative '
+                    f'components but model {model_ref} only has {rel_i.size}')
+        refs.extend(rel_comp_ref_list)
+        xvals.append(new_x[i,:num_rel])
+        yvals.append(new_y[i,:num_rel])
+        angs.append(new_ang[i,:num_rel])
+    return refs, np.concatenate(xvals), np.concatenate(yvals), np.concatenate(angs)
 
             
 